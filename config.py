@@ -22,102 +22,103 @@ Usage:
 import os
 import sys
 import logging
+import functools
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, Any
+from types import MappingProxyType
+from typing import Mapping, Optional, Any
 from dotenv import load_dotenv
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
-load_dotenv()
+# Variables already set in the environment (e.g. in CI) take precedence over .env
+load_dotenv(override=False, verbose=False)
 
-class Config:
+# Base paths
+_BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
+_OUTPUT_DIR = _BASE_DIR / 'output'
+_MARKDOWN_DIR = _OUTPUT_DIR / 'markdown'
+
+# Default provider order when none has been selected
+_PREFERENCE_ORDER = ("OpenAI", "Grok", "Anthropic")
+
+
+@dataclass(frozen=True, slots=True)
+class _Config:
     """Configuration settings for the application."""
 
     # Base paths
-    BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
-    INPUT_DIR = BASE_DIR / 'input'
-    OUTPUT_DIR = BASE_DIR / 'output'
-    MARKDOWN_DIR = OUTPUT_DIR / 'markdown'
-    IMAGES_DIR = MARKDOWN_DIR / 'images'
-    VECTORDB_DIR = OUTPUT_DIR / 'vectordb'
-    LOGS_DIR = BASE_DIR / 'logs'
+    BASE_DIR: Path = _BASE_DIR
+    INPUT_DIR: Path = _BASE_DIR / 'input'
+    OUTPUT_DIR: Path = _OUTPUT_DIR
+    MARKDOWN_DIR: Path = _MARKDOWN_DIR
+    IMAGES_DIR: Path = _MARKDOWN_DIR / 'images'
+    VECTORDB_DIR: Path = _OUTPUT_DIR / 'vectordb'
+    CACHE_DIR: Path = _OUTPUT_DIR / 'cache'
+    QUERY_CACHE_PATH: Path = _OUTPUT_DIR / 'cache' / 'query_cache.json'
+    LLM_CACHE_PATH: Path = _OUTPUT_DIR / 'cache' / 'llm_cache.db'
+    LOGS_DIR: Path = _BASE_DIR / 'logs'
 
     # API Keys (loaded from environment variables)
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "")
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
-    GROK_API_KEY = os.getenv("GROK_API_KEY", "")
+    OPENAI_API_KEY: str = field(default=os.getenv("OPENAI_API_KEY", ""), repr=False)
+    OPENAI_API_BASE: str = field(default=os.getenv("OPENAI_API_BASE", ""), repr=False)
+    ANTHROPIC_API_KEY: str = field(default=os.getenv("ANTHROPIC_API_KEY", ""), repr=False)
+    GROK_API_KEY: str = field(default=os.getenv("GROK_API_KEY", ""), repr=False)
 
     # Model names - hardcoded with latest versions
-    OPENAI_MODEL = "o3-mini"  # OpenAI's latest smaller reasoning model
-    ANTHROPIC_MODEL = "claude-3-opus-20240229"  # Anthropic's most capable model
-    GROK_MODEL = "grok-3-latest"  # xAI's latest model
+    OPENAI_MODEL: str = "o3-mini"  # OpenAI's latest smaller reasoning model
+    ANTHROPIC_MODEL: str = "claude-3-opus-20240229"  # Anthropic's most capable model
+    GROK_MODEL: str = "grok-3-latest"  # xAI's latest model
 
     # API endpoints
-    GROK_API_BASE = "https://api.xai.com/v1"
+    GROK_API_BASE: str = "https://api.xai.com/v1"
 
     # Vector database settings
-    CHUNK_SIZE = 1000
-    CHUNK_OVERLAP = 200
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"  # Local FastEmbed model, used for indexing and queries
+    RETRIEVAL_K: int = 3  # Number of chunks retrieved per question
+    INGEST_BATCH_SIZE: int = 512  # Chunks added to the vector database per write
 
     # LLM generation settings
     # Temperature controls randomness: 0.0 = deterministic, 1.0 = creative
     # Lower values (0.0-0.3) are better for factual/analytical tasks
     # Higher values (0.7-1.0) are better for creative tasks
-    TEMPERATURE = 0.2  # Default to low temperature for analytical summaries
+    TEMPERATURE: float = 0.2  # Default to low temperature for analytical summaries
 
-    # Selected model provider (can be changed at runtime)
-    SELECTED_PROVIDER = None
+    # Selected model provider; the only runtime-mutable setting, changed only via set_model_provider().
+    # Excluded from hashing so the instance stays a stable key for the cached helpers below
+    SELECTED_PROVIDER: Optional[str] = field(default=None, init=False, hash=False, compare=False)
 
-    @classmethod
-    def is_openai_configured(cls) -> bool:
+    # API availability flags, computed once since the keys never change after import
+    _OPENAI_OK: bool = field(init=False, repr=False)
+    _ANTHROPIC_OK: bool = field(init=False, repr=False)
+    _GROK_OK: bool = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_OPENAI_OK", bool(self.OPENAI_API_KEY and self.OPENAI_API_KEY != "your_openai_api_key"))
+        object.__setattr__(self, "_ANTHROPIC_OK", bool(self.ANTHROPIC_API_KEY and self.ANTHROPIC_API_KEY != "your_anthropic_api_key"))
+        object.__setattr__(self, "_GROK_OK", bool(self.GROK_API_KEY and self.GROK_API_KEY != "your_grok_api_key"))
+
+    def is_openai_configured(self) -> bool:
         """Check if OpenAI API is configured."""
-        return bool(cls.OPENAI_API_KEY and cls.OPENAI_API_KEY != "your_openai_api_key")
+        return self._OPENAI_OK
 
-    @classmethod
-    def is_anthropic_configured(cls) -> bool:
+    def is_anthropic_configured(self) -> bool:
         """Check if Anthropic API is configured."""
-        return bool(cls.ANTHROPIC_API_KEY and cls.ANTHROPIC_API_KEY != "your_anthropic_api_key")
+        return self._ANTHROPIC_OK
 
-    @classmethod
-    def is_grok_configured(cls) -> bool:
+    def is_grok_configured(self) -> bool:
         """Check if Grok API is configured."""
-        return bool(cls.GROK_API_KEY and cls.GROK_API_KEY != "your_grok_api_key")
+        return self._GROK_OK
 
-    @classmethod
-    def get_configured_models(cls) -> Dict[str, Dict[str, Any]]:
+    def get_configured_models(self) -> Mapping[str, Mapping[str, Any]]:
         """Get a dictionary of configured models with their settings."""
-        models = {}
-
-        if cls.is_openai_configured():
-            models["OpenAI"] = {
-                "name": cls.OPENAI_MODEL,
-                "api_key": cls.OPENAI_API_KEY,
-                "api_base": cls.OPENAI_API_BASE or None,
-                "temperature": cls.TEMPERATURE
-            }
-
-        if cls.is_anthropic_configured():
-            models["Anthropic"] = {
-                "name": cls.ANTHROPIC_MODEL,
-                "api_key": cls.ANTHROPIC_API_KEY,
-                "temperature": cls.TEMPERATURE
-            }
-
-        if cls.is_grok_configured():
-            models["Grok"] = {
-                "name": cls.GROK_MODEL,
-                "api_key": f"xai-{cls.GROK_API_KEY}",
-                "api_base": cls.GROK_API_BASE,
-                "temperature": cls.TEMPERATURE
-            }
-
-        return models
-
-    @classmethod
-    def set_model_provider(cls, provider: str) -> bool:
+        return _configured_models(self)
+
+    def set_model_provider(self, provider: str) -> bool:
         """
         Set the selected model provider.
 
@@ -127,104 +128,133 @@ class Config:
         Returns:
             bool: True if the provider was set successfully, False otherwise.
         """
-        models = cls.get_configured_models()
+        models = self.get_configured_models()
 
         if provider in models:
-            cls.SELECTED_PROVIDER = provider
+            # Config is frozen, so the selection is written past the dataclass __setattr__
+            object.__setattr__(self, "SELECTED_PROVIDER", provider)
+            _preferred_model.cache_clear()
             logger.info(f"Selected model provider: {provider}")
             return True
         else:
             logger.error(f"Provider {provider} is not configured or not available.")
             return False
 
-    @classmethod
-    def get_preferred_model(cls) -> Optional[Dict[str, Any]]:
+    def get_preferred_model(self) -> Optional[Mapping[str, Any]]:
         """
         Get the preferred model configuration based on availability or user selection.
 
         Returns:
-            Dict containing model configuration or None if no models are configured.
+            Read-only mapping containing model configuration or None if no models are configured.
         """
-        models = cls.get_configured_models()
+        return _preferred_model(self)
 
-        # If a provider has been explicitly selected, use it
-        if cls.SELECTED_PROVIDER and cls.SELECTED_PROVIDER in models:
-            return {
-                "provider": cls.SELECTED_PROVIDER,
-                "config": models[cls.SELECTED_PROVIDER]
-            }
-
-        # Otherwise, use the default order of preference
-        preference_order = ["OpenAI", "Grok", "Anthropic"]
-
-        for provider in preference_order:
-            if provider in models:
-                return {
-                    "provider": provider,
-                    "config": models[provider]
-                }
-
-        return None
-
-    @classmethod
-    def ensure_directories_exist(cls) -> None:
+    def ensure_directories_exist(self) -> None:
         """Ensure all required directories exist."""
-        os.makedirs(cls.INPUT_DIR, exist_ok=True)
-        os.makedirs(cls.OUTPUT_DIR, exist_ok=True)
-        os.makedirs(cls.MARKDOWN_DIR, exist_ok=True)
-        os.makedirs(cls.IMAGES_DIR, exist_ok=True)
-        os.makedirs(cls.VECTORDB_DIR, exist_ok=True)
-        os.makedirs(cls.LOGS_DIR, exist_ok=True)
+        # Leaf directories only; parents (OUTPUT_DIR, MARKDOWN_DIR) are created along the way
+        for directory in (self.INPUT_DIR, self.IMAGES_DIR, self.VECTORDB_DIR, self.CACHE_DIR, self.LOGS_DIR):
+            directory.mkdir(parents=True, exist_ok=True)
 
         logger.info("All required directories have been created.")
 
-    @classmethod
-    def validate_configuration(cls) -> bool:
+    def validate_configuration(self) -> bool:
         """
         Validate the configuration and ensure at least one model is configured.
 
         Returns:
             bool: True if configuration is valid, False otherwise.
         """
-        if not any([cls.is_openai_configured(), cls.is_anthropic_configured(), cls.is_grok_configured()]):
+        if not (self.is_openai_configured() or self.is_anthropic_configured() or self.is_grok_configured()):
             logger.error("No valid API keys found. At least one API key is required to run this program.")
             return False
 
         return True
 
-    @classmethod
-    def print_configuration(cls) -> None:
+    def print_configuration(self) -> None:
         """Print the current configuration (excluding sensitive information)."""
         logger.info("Current configuration:")
 
         # Print model availability
-        if cls.is_openai_configured():
-            logger.info(f"OpenAI API is configured with model: {cls.OPENAI_MODEL}")
-            if cls.OPENAI_API_BASE:
-                logger.info(f"Using custom API base: {cls.OPENAI_API_BASE}")
+        if self.is_openai_configured():
+            logger.info(f"OpenAI API is configured with model: {self.OPENAI_MODEL}")
+            if self.OPENAI_API_BASE:
+                logger.info(f"Using custom API base: {self.OPENAI_API_BASE}")
         else:
             logger.warning("OpenAI API is not configured")
 
-        if cls.is_anthropic_configured():
-            logger.info(f"Anthropic API is configured with model: {cls.ANTHROPIC_MODEL}")
+        if self.is_anthropic_configured():
+            logger.info(f"Anthropic API is configured with model: {self.ANTHROPIC_MODEL}")
         else:
             logger.warning("Anthropic API is not configured")
 
-        if cls.is_grok_configured():
-            logger.info(f"Grok API is configured with model: {cls.GROK_MODEL}")
+        if self.is_grok_configured():
+            logger.info(f"Grok API is configured with model: {self.GROK_MODEL}")
         else:
             logger.warning("Grok API is not configured")
 
         # Print preferred model
-        preferred = cls.get_preferred_model()
+        preferred = self.get_preferred_model()
         if preferred:
             logger.info(f"Preferred model: {preferred['provider']} ({preferred['config']['name']})")
         else:
             logger.warning("No models are configured")
 
         # Print generation settings
-        logger.info(f"Temperature: {cls.TEMPERATURE} ({'deterministic' if cls.TEMPERATURE < 0.3 else 'balanced' if cls.TEMPERATURE < 0.7 else 'creative'})")
+        logger.info(f"Temperature: {self.TEMPERATURE} ({'deterministic' if self.TEMPERATURE < 0.3 else 'balanced' if self.TEMPERATURE < 0.7 else 'creative'})")
+
+
+@functools.cache
+def _configured_models(config: _Config) -> Mapping[str, Mapping[str, Any]]:
+    """
+    Build the configured models mapping once; API keys are fixed after import.
+
+    The result is shared between callers, so it is returned read-only.
+    """
+    models = {}
+
+    if config.is_openai_configured():
+        models["OpenAI"] = {
+            "name": config.OPENAI_MODEL,
+            "api_key": config.OPENAI_API_KEY,
+            "api_base": config.OPENAI_API_BASE or None,
+            "temperature": config.TEMPERATURE
+        }
+
+    if config.is_anthropic_configured():
+        models["Anthropic"] = {
+            "name": config.ANTHROPIC_MODEL,
+            "api_key": config.ANTHROPIC_API_KEY,
+            "temperature": config.TEMPERATURE
+        }
+
+    if config.is_grok_configured():
+        models["Grok"] = {
+            "name": config.GROK_MODEL,
+            "api_key": f"xai-{config.GROK_API_KEY}",
+            "api_base": config.GROK_API_BASE,
+            "temperature": config.TEMPERATURE
+        }
+
+    return MappingProxyType({name: MappingProxyType(settings) for name, settings in models.items()})
+
+
+@functools.lru_cache(maxsize=1)
+def _preferred_model(config: _Config) -> Optional[Mapping[str, Any]]:
+    """
+    Resolve the preferred model; cleared by Config.set_model_provider().
+
+    The result is shared between callers, so it is returned read-only.
+    """
+    models = _configured_models(config)
+
+    # Use the explicitly selected provider, otherwise the first available by preference
+    selected = config.SELECTED_PROVIDER
+    provider = selected if selected in models else next((p for p in _PREFERENCE_ORDER if p in models), None)
+
+    return None if provider is None else MappingProxyType({"provider": provider, "config": models[provider]})
+
 
+Config = _Config()
 
 # Validate configuration on import
 if not Config.validate_configuration():
@@ -3,10 +3,9 @@ import sys
 import logging
 import fitz  # PyMuPDF
 import re
-from PIL import Image
-import io
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-import base64
 
 # Import our configuration
 from config import Config
@@ -19,29 +18,8 @@ input_dir = Config.INPUT_DIR
 output_dir = Config.MARKDOWN_DIR
 image_dir = Config.IMAGES_DIR
 
-# Ensure output directories exist
-os.makedirs(output_dir, exist_ok=True)
-os.makedirs(image_dir, exist_ok=True)
-
-# Get all PDF files in the input directory
-pdf_files = list(input_dir.glob('*.pdf'))
-
-if not pdf_files:
-    logger.error("No PDF files found in the input directory.")
-    print(f"\nNo PDF files found in the input directory: {input_dir}")
-    print("Please add PDF files and try again.\n")
-    sys.exit(1)
-
-logger.info(f"Found {len(pdf_files)} PDF files to process")
-
-def extract_text_with_formatting(page):
-    """Extract text from a page with basic formatting."""
-    text = page.get_text("text")
-    blocks = page.get_text("blocks")
-
-    # Sort blocks by vertical position (top to bottom)
-    blocks.sort(key=lambda b: b[1])  # Sort by y0 coordinate
-
+def extract_text_with_formatting(blocks):
+    """Format a page's text blocks (from page.get_text("blocks", sort=True)) as markdown."""
     formatted_text = ""
     for block in blocks:
         block_text = block[4]
@@ -53,8 +31,13 @@ def extract_text_with_formatting(page):
 
     return formatted_text
 
-def extract_images(page, doc_name, page_num):
-    """Extract images from a page and save them."""
+def extract_images(doc, page, doc_name, page_num, image_dir, saved_images):
+    """
+    Extract images from a page and save them.
+
+    saved_images maps xrefs already written for this document to their filenames,
+    so images repeated across pages (logos, headers) are only extracted once.
+    """
     image_list = []
     img_index = 0
 
@@ -63,6 +46,12 @@ def extract_images(page, doc_name, page_num):
 
     for img_index, img_info in enumerate(image_dict):
         xref = img_info[0]
+
+        # Reuse the file written for an earlier occurrence of the same image
+        if xref in saved_images:
+            image_list.append(f"![Image {img_index}](images/{saved_images[xref]})")
+            continue
+
         base_image = doc.extract_image(xref)
         image_bytes = base_image["image"]
 
@@ -71,68 +60,51 @@ def extract_images(page, doc_name, page_num):
         image_path = image_dir / image_filename
 
         # Save image
-        with open(image_path, "wb") as img_file:
-            img_file.write(image_bytes)
+        image_path.write_bytes(image_bytes)
+        saved_images[xref] = image_filename
 
         # Add image reference to list
         image_list.append(f"![Image {img_index}](images/{image_filename})")
 
     return image_list
 
+_PSI_LATEX = '$|\\psi\\rangle = \\alpha|0\\rangle + \\beta|1\\rangle$'
+
+# Formulas we know how to rewrite, one named group per LaTeX replacement.
+# A single alternation lets each page be scanned once for all of them.
+_FORMULA_SUB = re.compile(
+    r'(?P<emc2>E = m(?: \* |\*)?c\^2)'  # E = mc^2
+    r'|(?P<co2>CO_?2)'  # CO2
+    r'|(?P<h2o>H_?2O)'  # H2O
+    r'|(?P<psi>\|ψ⟩ = α\|0⟩ \+ β\|1⟩)'  # |psi> in Unicode
+    r'|(?P<psi_tex>\|\s*\\psi\s*\\rangle\s*=\s*\\alpha\s*\|0\s*\\rangle\s*\+\s*\\beta\s*\|1\s*\\rangle)'  # |psi> in LaTeX
+)
+_FORMULA_LATEX = {
+    'emc2': '$E = m \\cdot c^2$',
+    'co2': '$CO_2$',
+    'h2o': '$H_2O$',
+    'psi': _PSI_LATEX,
+    'psi_tex': _PSI_LATEX,
+}
+
+# Substrings at least one of which must be present for _FORMULA_SUB to match
+_FORMULA_KEYS = ('c^2', 'CO2', 'CO_2', 'H2O', 'H_2O', 'ψ', '\\psi')
+
 def detect_and_preserve_formulas(text):
     """Detect potential mathematical formulas and preserve them as LaTeX."""
-    # Simple pattern to detect potential formulas
-    formula_patterns = [
-        r'E\s*=\s*m\s*\*?\s*c\s*\^?\s*2',  # E = mc^2
-        r'CO_?2',  # CO2
-        r'H_?2O',  # H2O
-        r'\\psi',  # psi
-        r'\\alpha',  # alpha
-        r'\\beta',  # beta
-        r'\|\s*\\psi\s*\\rangle',  # |psi>
-    ]
-
-    # Replace detected formulas with LaTeX format
-    for pattern in formula_patterns:
-        if re.search(pattern, text):
-            if 'E = m' in text and 'c^2' in text:
-                text = text.replace('E = m * c^2', '$E = m \\cdot c^2$')
-                text = text.replace('E = m*c^2', '$E = m \\cdot c^2$')
-                text = text.replace('E = mc^2', '$E = m \\cdot c^2$')
-
-            if 'CO2' in text or 'CO_2' in text:
-                text = text.replace('CO2', '$CO_2$')
-                text = text.replace('CO_2', '$CO_2$')
-
-            if 'H2O' in text or 'H_2O' in text:
-                text = text.replace('H2O', '$H_2O$')
-                text = text.replace('H_2O', '$H_2O$')
-
-            # Fix the syntax error by avoiding walrus operator
-            if '|ψ⟩ = α|0⟩ + β|1⟩' in text:
-                text = text.replace('|ψ⟩ = α|0⟩ + β|1⟩', '$|\\psi\\rangle = \\alpha|0\\rangle + \\beta|1\\rangle$')
-
-            # Check for similar formula without assignment expression
-            similar_formula = re.search(r'\|\s*\\psi\s*\\rangle\s*=\s*\\alpha\s*\|0\s*\\rangle\s*\+\s*\\beta\s*\|1\s*\\rangle', text)
-            if similar_formula:
-                text = text.replace(similar_formula.group(0), '$|\\psi\\rangle = \\alpha|0\\rangle + \\beta|1\\rangle$')
-
-    return text
-
-def detect_tables(page):
-    """Detect and format tables from a page."""
-    # This is a simplified approach - real table detection is complex
-    tables = []
+    # Cheap substring checks skip the regex scan on pages without any formula
+    if not any(key in text for key in _FORMULA_KEYS):
+        return text
 
-    # Get blocks that might represent table cells
-    blocks = page.get_text("blocks")
+    return _FORMULA_SUB.sub(lambda match: _FORMULA_LATEX[match.lastgroup], text)
 
-    # Simple heuristic: look for grid-like arrangements of text blocks
-    # This is very simplified and won't work for all tables
+def detect_tables(text):
+    """Detect and format tables from a page's raw text."""
+    # This is a simplified approach - real table detection is complex
+    tables = []
 
     # For our demo PDFs, we know there's a climate data table
     # So we'll just check if this page has content about climate data
-    text = page.get_text()
     if "CO₂" in text and "ppm" in text and "Temp" in text:
         # Create a markdown table based on what we expect in the climate PDF
         table = """
@@ -145,54 +117,104 @@ def detect_tables(page):
 
     return tables
 
-# Process each PDF file
-for pdf_path in pdf_files:
+def convert_one(pdf_path, output_dir, image_dir):
+    """Convert a single PDF to markdown and return the markdown file path."""
     logger.info(f"Processing {pdf_path.name}...")
 
-    # Output file path
+    # Output file path, and a temporary file next to it that is only moved into place once complete
     output_path = output_dir / f"{pdf_path.stem}.md"
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+
+    # Stream each page to the markdown file instead of building the whole document in memory
+    try:
+        with fitz.open(pdf_path) as doc, open(tmp_path, "w", encoding="utf-8") as md_file:
+            md_file.write(f"# {pdf_path.stem.replace('_', ' ').title()}\n\n")
+
+            # Image xref -> saved filename, shared across pages of this document
+            saved_images = {}
 
-    # Open the PDF
-    doc = fitz.open(pdf_path)
+            # Process each page
+            for page_num, page in enumerate(doc):
+                logger.debug("  Processing page %d/%d", page_num + 1, len(doc))
 
-    # Initialize markdown content
-    markdown_content = f"# {pdf_path.stem.replace('_', ' ').title()}\n\n"
+                # Extract the page layout once; everything below is derived from these blocks
+                # sort=True orders blocks top to bottom (then left to right) inside PyMuPDF
+                blocks = page.get_text("blocks", sort=True)
+                raw_text = "\n".join(block[4] for block in blocks)
 
-    # Process each page
-    for page_num, page in enumerate(doc):
-        logger.info(f"  Processing page {page_num + 1}/{len(doc)}")
+                # Extract text with formatting
+                page_text = extract_text_with_formatting(blocks)
 
-        # Extract text with formatting
-        page_text = extract_text_with_formatting(page)
+                # Detect and preserve formulas
+                page_text = detect_and_preserve_formulas(page_text)
 
-        # Detect and preserve formulas
-        page_text = detect_and_preserve_formulas(page_text)
+                # Extract images
+                images = extract_images(doc, page, pdf_path.stem, page_num, image_dir, saved_images)
 
-        # Extract images
-        images = extract_images(page, pdf_path.stem, page_num)
+                # Detect tables
+                tables = detect_tables(raw_text)
 
-        # Detect tables
-        tables = detect_tables(page)
+                # Add content to markdown
+                parts = [page_text]
 
-        # Add content to markdown
-        markdown_content += page_text
+                # Add images
+                if images:
+                    parts.append("\n## Images\n\n")
+                    parts.extend(f"{img}\n\n" for img in images)
 
-        # Add images
-        if images:
-            markdown_content += "\n## Images\n\n"
-            for img in images:
-                markdown_content += f"{img}\n\n"
+                # Add tables
+                if tables:
+                    parts.append("\n## Data\n\n")
+                    parts.extend(f"{table}\n\n" for table in tables)
 
-        # Add tables
-        if tables:
-            markdown_content += "\n## Data\n\n"
-            for table in tables:
-                markdown_content += f"{table}\n\n"
+                md_file.writelines(parts)
 
-    # Write markdown to file
-    with open(output_path, "w", encoding="utf-8") as md_file:
-        md_file.write(markdown_content)
+        # Replace the output in one step, so a failed conversion never leaves a truncated file to be indexed
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
     logger.info(f"Converted {pdf_path.name} to {output_path}")
 
-logger.info("All PDF files have been converted to Markdown format")
+    return output_path
+
+def _init_worker():
+    """Configure logging in worker processes, which don't inherit it when spawned."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+def main():
+    """Convert every PDF in the input directory to markdown and return the markdown paths."""
+    # Ensure output directories exist (image_dir lives inside output_dir)
+    image_dir.mkdir(parents=True, exist_ok=True)
+
+    # Get all PDF files in the input directory
+    pdf_files = list(input_dir.glob('*.pdf'))
+
+    if not pdf_files:
+        logger.error("No PDF files found in the input directory.")
+        print(f"\nNo PDF files found in the input directory: {input_dir}")
+        print("Please add PDF files and try again.\n")
+        return []
+
+    logger.info(f"Found {len(pdf_files)} PDF files to process")
+
+    # Each PDF writes its own markdown and image files, so they convert independently
+    max_workers = min(len(pdf_files), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        markdown_paths = list(executor.map(convert_one, pdf_files, repeat(output_dir), repeat(image_dir)))
+
+    logger.info("All PDF files have been converted to Markdown format")
+    return markdown_paths
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Exit with an error status when there was nothing to convert
+    if not main():
+        sys.exit(1)
@@ -44,21 +44,12 @@ file_handler.setLevel(logging.ERROR)  # Only log errors to file
 file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(file_formatter)
 
-# Configure console logging separately (for info level)
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(console_formatter)
-
 # Get the root logger and add file handler
 root_logger = logging.getLogger()
 root_logger.addHandler(file_handler)
 
-# Configure module logger
+# Configure module logger (messages propagate to the root handlers above)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.handlers = []  # Remove default handlers
-logger.addHandler(console_handler)  # Add console handler
 
 def setup_directories():
     """Create necessary directories if they don't exist."""
@@ -84,6 +75,7 @@ def convert_pdfs_to_markdown():
     logger.info("Converting PDFs to markdown...")
     try:
         import convert_pdfs
+        convert_pdfs.main()
         logger.info("PDFs converted to markdown successfully.")
     except Exception as e:
         logger.error(f"Error converting PDFs: {e}")
@@ -182,13 +174,15 @@ def main():
 
     args = parser.parse_args()
 
+    requested = args.all or args.convert or args.setup_db or args.process
+
     # If only config flag is provided, just show configuration
-    if args.config and not any(v for k, v in vars(args).items() if k != 'config' and v):
+    if args.config and not requested:
         Config.print_configuration()
         return
 
-    # If no arguments provided, show help
-    if not any(vars(args).values()):
+    # If no steps requested, show help
+    if not requested:
         parser.print_help()
         return
 
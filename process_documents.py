@@ -1,12 +1,21 @@
 import os
+import json
+import asyncio
+import atexit
+import httpx
 from pathlib import Path
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.embeddings import FastEmbedEmbeddings
+from langchain_community.cache import SQLiteCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
 from langchain.chains import RetrievalQA
 from langchain_openai import ChatOpenAI
+from langchain_core.documents import Document
+from langchain_core.outputs import Generation
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.runnables import RunnableConfig, RunnablePassthrough
 from langgraph.graph import StateGraph, END, START
 from typing import Dict, TypedDict, List, Any, Tuple, Union
 import logging
@@ -17,6 +26,9 @@ from config import Config
 # Import timer for runtime management
 from timer import RuntimeTimer, timer_decorator, timed_section
 
+# Import semantic cache for retrieval results
+from query_cache import QueryCache
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -30,15 +42,25 @@ class GraphState(TypedDict):
     chinese_summary: Dict[str, Any]  # 添加中文总结字段
 
 # Initialize embeddings and vector database
-embeddings = FakeEmbeddings(size=1536)  # 使用 FakeEmbeddings 作为替代
+embeddings = FastEmbedEmbeddings(model_name=Config.EMBEDDING_MODEL)  # 必须与 setup_vectordb.py 使用相同的模型
 vectordb = Chroma(persist_directory=str(Config.VECTORDB_DIR), embedding_function=embeddings)
 
-# Create a retriever
-retriever = vectordb.as_retriever(search_kwargs={"k": 5})
+# Cache retrieval results by query similarity, and LLM responses by exact prompt,
+# so repeated questions skip both the vector search and the LLM calls
+query_cache = QueryCache(Config.QUERY_CACHE_PATH)
+Config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+set_llm_cache(SQLiteCache(database_path=str(Config.LLM_CACHE_PATH)))
+
+# Shared connection pools for the OpenAI-compatible clients, so concurrent requests
+# reuse TCP/TLS connections (multiplexed over HTTP/2) instead of opening new ones.
+# The async pool is bound to an event loop, so each run opens its own (see _run_questions)
+http_limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+http_client = httpx.Client(http2=True, limits=http_limits)
+atexit.register(http_client.close)
 
 # Define LLM - use a fallback mechanism to try different models
-def get_llm():
-    """Initialize LLM based on configuration."""
+def get_llm(http_async_client=None):
+    """Initialize LLM based on configuration, using the given async HTTP client."""
     preferred_model = Config.get_preferred_model()
 
     if not preferred_model:
@@ -57,13 +79,17 @@ def get_llm():
                     model_name=config["name"],
                     openai_api_key=config["api_key"],
                     openai_api_base=config["api_base"],
-                    temperature=config["temperature"]
+                    temperature=config["temperature"],
+                    http_client=http_client,
+                    http_async_client=http_async_client
                 )
             else:
                 return ChatOpenAI(
                     model_name=config["name"],
                     openai_api_key=config["api_key"],
-                    temperature=config["temperature"]
+                    temperature=config["temperature"],
+                    http_client=http_client,
+                    http_async_client=http_async_client
                 )
 
         elif provider == "Grok":
@@ -72,7 +98,9 @@ def get_llm():
                 model_name=config["name"],
                 openai_api_key=config["api_key"],
                 openai_api_base=config["api_base"],
-                temperature=config["temperature"]
+                temperature=config["temperature"],
+                http_client=http_client,
+                http_async_client=http_async_client
             )
 
         elif provider == "Anthropic":
@@ -91,9 +119,6 @@ def get_llm():
         logger.error(f"{provider} initialization failed: {e}")
         raise  # If initialization fails, directly raise the exception
 
-# Get LLM
-llm = get_llm()
-
 # Define prompts
 retrieval_prompt = PromptTemplate.from_template(
     """You are an AI assistant tasked with analyzing academic documents.
@@ -107,27 +132,11 @@ retrieval_prompt = PromptTemplate.from_template(
     Answer:"""
 )
 
-summary_prompt = PromptTemplate.from_template(
-    """You are an AI assistant tasked with creating comprehensive summaries of academic documents.
+# Define bilingual summary prompt (English and Chinese in one response)
+bilingual_summary_prompt = PromptTemplate.from_template(
+    """You are an AI assistant tasked with creating comprehensive summaries of academic documents in English and Chinese.
 
     Based on the following information extracted from multiple documents, create a detailed summary that includes:
-    1. Key points from each document
-    2. Important concepts and ideas
-    3. Connections and relationships between the documents
-    4. Any significant findings or conclusions
-
-    Information:
-    {context}
-
-    Please format your response as a well-structured markdown document with appropriate headings, subheadings, and bullet points.
-    """
-)
-
-# Define Chinese summary prompt
-chinese_summary_prompt = PromptTemplate.from_template(
-    """You are an AI assistant tasked with creating comprehensive summaries of academic documents in Chinese.
-
-    Based on the following information extracted from multiple documents, create a detailed summary in Chinese (Simplified Chinese) that includes:
     1. Key points from each document (每份文档的要点)
     2. Important concepts and ideas (重要概念和想法)
     3. Connections and relationships between the documents (文档之间的联系和关系)
@@ -136,61 +145,147 @@ chinese_summary_prompt = PromptTemplate.from_template(
     Information:
     {context}
 
-    Please format your response as a well-structured markdown document with appropriate headings, subheadings, and bullet points in Chinese.
+    Respond with only a JSON object outlining the summary, giving every heading and bullet point in English and in Chinese (Simplified Chinese):
+    {{"outline": [{{"heading": "...", "heading_zh": "...", "bullets": ["..."], "bullets_zh": ["..."]}}]}}
     """
 )
 
-# Define LangChain retrieval chain
-def retrieval_chain(state):
-    question = state["question"]
-    docs = retriever.get_relevant_documents(question)
-    state["context"] = [doc.page_content for doc in docs]
-    state["documents"] = [doc.metadata.get("source", "unknown") for doc in docs]
-    return state
+# Build the LLM chains once per run; the graph nodes only invoke them
+def build_chains(llm):
+    """Build the answer and summary chains for an LLM."""
+    model = Config.get_preferred_model()
+    return {
+        "answer": retrieval_prompt | llm | StrOutputParser(),
+        # The raw summary response bypasses the LLM cache; only validated outlines are cached
+        # (see generate_outline), so a malformed response is never replayed on later runs
+        "bilingual_summary": bilingual_summary_prompt | llm.model_copy(update={"cache": False}) | JsonOutputParser(),
+        "outline_cache_key": f"bilingual_outline:{model['provider']}:{model['config']['name']}:{model['config']['temperature']}"
+    }
+
+# Define batched retrieval for all questions
+def retrieve_documents(questions):
+    """
+    Retrieve the relevant chunks for every question at once.
+
+    All questions are embedded in one batch, and every question the query cache
+    can't answer is searched in a single multi-query Chroma call.
+
+    Returns:
+        List of documents for each question, in question order.
+    """
+    query_embeddings = embeddings.embed_documents(questions)
+    docs_per_question = [query_cache.get(embedding) for embedding in query_embeddings]
+
+    misses = [i for i, docs in enumerate(docs_per_question) if docs is None]
+    if misses:
+        response = vectordb._collection.query(
+            query_embeddings=[query_embeddings[i] for i in misses],
+            n_results=Config.RETRIEVAL_K,
+            include=["documents", "metadatas"]
+        )
+        for i, texts, metadatas in zip(misses, response["documents"], response["metadatas"]):
+            docs = [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+            query_cache.put(query_embeddings[i], docs)
+            docs_per_question[i] = docs
+
+    return docs_per_question
 
 # Define answer generation node
-def generate_answer(state):
+async def generate_answer(state, config: RunnableConfig):
     context = "\n\n".join(state["context"])
-    chain = retrieval_prompt | llm | StrOutputParser()
-    state["answer"] = chain.invoke({"context": context, "question": state["question"]})
+    answer_chain = config["configurable"]["chains"]["answer"]
+    state["answer"] = await answer_chain.ainvoke({"context": context, "question": state["question"]})
     return state
 
-# Define summary generation node
-def generate_summary(state):
+def parse_outline(response):
+    """
+    Check the shape of a parsed summary response and return its outline.
+
+    Raises:
+        OutputParserException: If the outline is empty, or any section lacks a non-empty
+            heading in either language or a list of string bullets in either language.
+    """
+    outline = response.get("outline") if isinstance(response, dict) else None
+    if not isinstance(outline, list) or not outline or not all(isinstance(section, dict) for section in outline):
+        raise OutputParserException(f"Expected a non-empty list of outline sections, got: {response!r}")
+
+    for section in outline:
+        for heading_key in ("heading", "heading_zh"):
+            heading = section.get(heading_key)
+            if not isinstance(heading, str) or not heading.strip():
+                raise OutputParserException(f"Expected '{heading_key}' to be a non-empty string, got: {heading!r}")
+        for bullets_key in ("bullets", "bullets_zh"):
+            bullets = section.get(bullets_key)
+            if not isinstance(bullets, list) or not all(isinstance(bullet, str) for bullet in bullets):
+                raise OutputParserException(f"Expected '{bullets_key}' to be a list of strings, got: {bullets!r}")
+
+    return outline
+
+def render_outline(outline, heading_key, bullets_key):
+    """Render a validated summary outline as markdown, using the given language's keys."""
+    parts = []
+    for section in outline:
+        parts.append(f"### {section[heading_key]}\n\n")
+        parts.extend(f"- {bullet}\n" for bullet in section[bullets_key])
+        parts.append("\n")
+    return "".join(parts).strip()
+
+async def generate_outline(chains, full_context, question):
+    """
+    Get the validated bilingual outline for a context, from the LLM cache or the LLM.
+
+    A malformed response is retried once; only an outline that passes parse_outline()
+    is written to the cache.
+
+    Returns:
+        The outline, or None if both attempts returned a malformed outline.
+    """
+    llm_cache = get_llm_cache()
+    prompt = bilingual_summary_prompt.format(context=full_context)
+    cached = await llm_cache.alookup(prompt, chains["outline_cache_key"])
+    if cached:
+        try:
+            return parse_outline(json.loads(cached[0].text))
+        except (ValueError, OutputParserException) as e:
+            # Regenerate, overwriting the unreadable entry below
+            logger.warning(f"Ignoring unreadable cached outline for: {question}: {e}")
+
+    for attempt in range(1, 3):
+        try:
+            outline = parse_outline(await chains["bilingual_summary"].ainvoke({"context": full_context}))
+        except OutputParserException as e:
+            logger.warning(f"Could not parse the summary outline for: {question} (attempt {attempt}): {e}")
+            continue
+
+        await llm_cache.aupdate(prompt, chains["outline_cache_key"], [Generation(text=json.dumps({"outline": outline}, ensure_ascii=False))])
+        return outline
+
+    return None
+
+# Define bilingual summary generation node
+async def generate_bilingual_summary(state, config: RunnableConfig):
     # Collect all answers and contexts
     all_content = state["context"] + [state["answer"]]
     full_context = "\n\n".join(all_content)
 
-    # Generate summary
-    chain = summary_prompt | llm | StrOutputParser()
-    summary = chain.invoke({"context": full_context})
+    # Generate a bilingual outline in a single LLM call; if it stays malformed after a retry,
+    # only this question's summaries are dropped
+    outline = await generate_outline(config["configurable"]["chains"], full_context, state["question"])
+    if outline is None:
+        logger.error(f"No summary generated for: {state['question']}")
+        return state
+
+    # Render both languages from the validated outline
+    content = render_outline(outline, "heading", "bullets")
+    chinese_content = render_outline(outline, "heading_zh", "bullets_zh")
 
-    # Store in state
     state["summary"] = {
-        "content": summary,
+        "content": content,
         "sources": state["documents"],
         "question": state["question"]
     }
-    return state
-
-# Define Chinese summary generation node
-def generate_chinese_summary(state):
-    # Check if summary exists
-    if "summary" not in state or not state["summary"]:
-        logger.warning("No English summary found. Cannot generate Chinese summary.")
-        return state
-
-    # Use the English summary as context for the Chinese summary
-    english_summary = state["summary"]["content"]
-
-    # Generate Chinese summary
-    logger.info("Generating Chinese summary...")
-    chain = chinese_summary_prompt | llm | StrOutputParser()
-    chinese_summary = chain.invoke({"context": english_summary})
-
-    # Store in state
     state["chinese_summary"] = {
-        "content": chinese_summary,
+        "content": chinese_content,
         "sources": state["documents"],
         "question": state["question"]
     }
@@ -204,21 +299,37 @@ def should_end(state):
 workflow = StateGraph(GraphState)
 
 # Add nodes
-workflow.add_node("retrieval", retrieval_chain)
 workflow.add_node("answer_generation", generate_answer)
-workflow.add_node("summary_generation", generate_summary)
-workflow.add_node("chinese_summary_generation", generate_chinese_summary)
+workflow.add_node("bilingual_summary", generate_bilingual_summary)
 
-# Add edges - including START edge
-workflow.add_edge(START, "retrieval")
-workflow.add_edge("retrieval", "answer_generation")
-workflow.add_edge("answer_generation", "summary_generation")
-workflow.add_edge("summary_generation", "chinese_summary_generation")
-workflow.add_edge("chinese_summary_generation", END)
+# Add edges - including START edge (retrieval runs for all questions before the graph)
+workflow.add_edge(START, "answer_generation")
+workflow.add_edge("answer_generation", "bilingual_summary")
+workflow.add_edge("bilingual_summary", END)
 
 # Compile the graph
 graph = workflow.compile()
 
+async def _run_question(index, question, docs, total, chains):
+    """Run the graph for a single question and its retrieved documents."""
+    logger.info(f"Processing question {index+1}/{total}: {question}")
+    with timed_section(f"Question {index+1}: {question[:30]}..."):
+        return await graph.ainvoke({
+            "question": question,
+            "context": [doc.page_content for doc in docs],
+            "documents": [doc.metadata.get("source", "unknown") for doc in docs]
+        }, config={"configurable": {"chains": chains}})
+
+async def _run_questions(questions, docs_per_question):
+    """Run the graph for all questions concurrently, returning results in question order."""
+    # Open the async connection pool on this run's event loop and close it before the loop ends
+    async with httpx.AsyncClient(http2=True, limits=http_limits) as http_async_client:
+        chains = build_chains(get_llm(http_async_client))
+        return await asyncio.gather(
+            *(_run_question(i, question, docs, len(questions), chains)
+              for i, (question, docs) in enumerate(zip(questions, docs_per_question)))
+        )
+
 @timer_decorator(task_name="Process Documents with LangGraph")
 def process_documents() -> Tuple[Path, Path]:
     """Process documents and generate a summary."""
@@ -234,44 +345,43 @@ def process_documents() -> Tuple[Path, Path]:
         "What are the important ideas across all documents?"
     ]
 
-    # Process each question
-    results = []
-    for i, question in enumerate(questions):
-        logger.info(f"Processing question {i+1}/{len(questions)}: {question}")
-        with timed_section(f"Question {i+1}: {question[:30]}..."):
-            result = graph.invoke({"question": question})
-            results.append(result)
+    # Retrieve context for all questions in one batch
+    with timed_section("Retrieve Documents"):
+        docs_per_question = retrieve_documents(questions)
+
+    # Process the questions concurrently; each one is dominated by LLM network latency
+    results = asyncio.run(_run_questions(questions, docs_per_question))
+    query_cache.save()
 
     # Combine all summaries into a final summary
     with timed_section("Generate English Summary"):
-        final_summary = """# Comprehensive Summary of Documents
+        parts = ["""# Comprehensive Summary of Documents
 
 ## Overview
 This document provides a comprehensive summary of the key points, important concepts, and connections between multiple documents on artificial intelligence, quantum computing, and climate change.
 
-"""
+"""]
 
         # Add individual summaries
         for i, result in enumerate(results):
             if "summary" in result and "content" in result["summary"]:
-                final_summary += f"\n## Analysis {i+1}: {result['summary']['question']}\n\n"
-                final_summary += result["summary"]["content"]
-                final_summary += "\n\n"
+                parts.append(f"\n## Analysis {i+1}: {result['summary']['question']}\n\n")
+                parts.append(result["summary"]["content"])
+                parts.append("\n\n")
 
         # Add sources section
-        final_summary += "\n## Sources\n\n"
+        parts.append("\n## Sources\n\n")
         all_sources = set()
         for result in results:
             if "summary" in result and "sources" in result["summary"]:
                 all_sources.update(result["summary"]["sources"])
 
-        for source in all_sources:
-            final_summary += f"- {source}\n"
+        sources_list = "".join(f"- {source}\n" for source in all_sources)
+        parts.append(sources_list)
 
         # Write the final summary to a file
         summary_path = Config.OUTPUT_DIR / 'summary.md'
-        with open(summary_path, "w") as f:
-            f.write(final_summary)
+        summary_path.write_text("".join(parts), encoding="utf-8")
 
         logger.info(f"Summary generated and saved to {summary_path}")
 
@@ -280,29 +390,27 @@ This document provides a comprehensive summary of the key points, important conc
 
     with timed_section("Generate Chinese Summary"):
         # Create Chinese summary template
-        chinese_final_summary = """# 文档综合摘要
+        chinese_parts = ["""# 文档综合摘要
 
 ## 概述
 本文档提供了关于人工智能、量子计算和气候变化的多份文档的要点、重要概念和联系的综合摘要。
 
-"""
+"""]
 
         # Add individual Chinese summaries
         for i, result in enumerate(results):
             if "chinese_summary" in result and "content" in result["chinese_summary"]:
-                chinese_final_summary += f"\n## 分析 {i+1}: {result['chinese_summary']['question']}\n\n"
-                chinese_final_summary += result["chinese_summary"]["content"]
-                chinese_final_summary += "\n\n"
+                chinese_parts.append(f"\n## 分析 {i+1}: {result['chinese_summary']['question']}\n\n")
+                chinese_parts.append(result["chinese_summary"]["content"])
+                chinese_parts.append("\n\n")
 
         # Add sources section
-        chinese_final_summary += "\n## 来源\n\n"
-        for source in all_sources:
-            chinese_final_summary += f"- {source}\n"
+        chinese_parts.append("\n## 来源\n\n")
+        chinese_parts.append(sources_list)
 
         # Write the Chinese summary to a file
         chinese_summary_path = Config.OUTPUT_DIR / 'summary_chinese.md'
-        with open(chinese_summary_path, "w") as f:
-            f.write(chinese_final_summary)
+        chinese_summary_path.write_text("".join(chinese_parts), encoding="utf-8")
 
         logger.info(f"Chinese summary generated and saved to {chinese_summary_path}")
 
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Semantic Query Cache for PDF Processing System
+
+This module caches vector database search results keyed by the query
+embedding. A new query whose embedding is close enough to a cached one
+(cosine similarity at or above a threshold) reuses the cached documents
+instead of searching the vector database again.
+
+Entries are evicted least-recently-used once the cache is full and expire
+after a time-to-live. The cache is persisted to a JSON file so repeated
+runs can reuse it; it must be invalidated whenever the vector database is
+rebuilt.
+
+Usage:
+    from query_cache import QueryCache
+
+    cache = QueryCache(Config.QUERY_CACHE_PATH)
+
+    docs = cache.get(query_embedding)
+    if docs is None:
+        docs = vectordb.similarity_search_by_vector(query_embedding, k=3)
+        cache.put(query_embedding, docs)
+
+    # Persist the cache for the next run
+    cache.save()
+
+    # After rebuilding the vector database
+    cache.invalidate()
+"""
+
+import json
+import time
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class QueryCache:
+    """
+    A persistent semantic cache of vector search results.
+
+    Entries are kept in least-recently-used order, oldest first.
+    """
+
+    def __init__(self, path: Path, similarity_threshold: float = 0.95,
+                 max_entries: int = 256, ttl_seconds: float = 7 * 24 * 3600):
+        """
+        Initialize the cache, loading any entries persisted at path.
+
+        Args:
+            path: JSON file the cache is persisted to
+            similarity_threshold: Minimum cosine similarity for a cache hit (default: 0.95)
+            max_entries: Maximum number of cached queries (default: 256)
+            ttl_seconds: Time in seconds before an entry expires (default: one week)
+        """
+        self.path = Path(path)
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._embeddings: List[np.ndarray] = []
+        self._documents: List[List[Document]] = []
+        self._timestamps: List[float] = []
+        self._load()
+
+    def get(self, embedding: Sequence[float]) -> Optional[List[Document]]:
+        """
+        Look up the documents cached for a similar query.
+
+        Args:
+            embedding: Embedding of the query
+
+        Returns:
+            The cached documents, or None on a cache miss.
+        """
+        self._expire()
+        if not self._embeddings:
+            return None
+
+        similarities = np.stack(self._embeddings) @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        # Move the hit to the most-recently-used end
+        documents = self._documents[best]
+        self._append(self._embeddings.pop(best), self._documents.pop(best), self._timestamps.pop(best))
+        logger.info(f"Query cache hit (similarity {similarities[best]:.3f})")
+        return documents
+
+    def put(self, embedding: Sequence[float], documents: List[Document]) -> None:
+        """
+        Cache the documents retrieved for a query.
+
+        Args:
+            embedding: Embedding of the query
+            documents: Documents returned by the vector search
+        """
+        self._append(self._normalize(embedding), documents, time.time())
+
+        # Evict the least recently used entries
+        excess = len(self._embeddings) - self.max_entries
+        if excess > 0:
+            del self._embeddings[:excess], self._documents[:excess], self._timestamps[:excess]
+
+    def save(self) -> None:
+        """Persist the cache to disk."""
+        self._expire()
+        entries = [
+            {
+                "embedding": embedding.tolist(),
+                "documents": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+                "timestamp": timestamp,
+            }
+            for embedding, documents, timestamp in zip(self._embeddings, self._documents, self._timestamps)
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"entries": entries}), encoding="utf-8")
+
+    def invalidate(self) -> None:
+        """Drop all cached entries, including the persisted file."""
+        self._embeddings.clear()
+        self._documents.clear()
+        self._timestamps.clear()
+        self.path.unlink(missing_ok=True)
+        logger.info("Query cache invalidated")
+
+    def _load(self) -> None:
+        """Load persisted entries, ignoring a missing or unreadable file."""
+        if not self.path.exists():
+            return
+
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable query cache {self.path}: {e}")
+            return
+
+        for entry in entries:
+            self._append(
+                np.asarray(entry["embedding"], dtype=np.float32),
+                [Document(**doc) for doc in entry["documents"]],
+                entry["timestamp"],
+            )
+        self._expire()
+
+    def _expire(self) -> None:
+        """Drop entries older than the time-to-live."""
+        cutoff = time.time() - self.ttl_seconds
+        keep = [i for i, timestamp in enumerate(self._timestamps) if timestamp >= cutoff]
+        if len(keep) != len(self._timestamps):
+            self._embeddings = [self._embeddings[i] for i in keep]
+            self._documents = [self._documents[i] for i in keep]
+            self._timestamps = [self._timestamps[i] for i in keep]
+
+    def _append(self, embedding: np.ndarray, documents: List[Document], timestamp: float) -> None:
+        """Add an entry at the most-recently-used end."""
+        self._embeddings.append(embedding)
+        self._documents.append(documents)
+        self._timestamps.append(timestamp)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Scale an embedding to unit length so a dot product gives cosine similarity."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -1,17 +1,20 @@
 import os
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import MarkdownTextSplitter
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import FakeEmbeddings
-from dotenv import load_dotenv
+from langchain_community.embeddings import FastEmbedEmbeddings
 
-# Load environment variables
-load_dotenv()
+# Import our configuration (this also loads the .env file)
+from config import Config
+
+# Import the query cache so it can be invalidated after a rebuild
+from query_cache import QueryCache
 
 # Define paths
-markdown_dir = Path('./output/markdown')
-db_dir = Path('./output/vectordb')
+markdown_dir = Config.MARKDOWN_DIR
+db_dir = Config.VECTORDB_DIR
 
 # Ensure vector database directory exists
 os.makedirs(db_dir, exist_ok=True)
@@ -20,41 +23,46 @@ os.makedirs(db_dir, exist_ok=True)
 markdown_files = list(markdown_dir.glob('*.md'))
 print(f"Found {len(markdown_files)} markdown files to process")
 
-# Initialize document list
-documents = []
-
-# Load and process each markdown file
-for md_file in markdown_files:
+def load_markdown(md_file):
+    """Load a markdown file, tagging its documents with the source file name."""
     print(f"Processing {md_file.name}...")
 
     # Load the markdown file
-    loader = TextLoader(md_file)
+    loader = TextLoader(md_file, encoding="utf-8")
     docs = loader.load()
 
     # Add metadata to identify source file
     for doc in docs:
         doc.metadata['source'] = md_file.name
 
-    # Add to documents list
-    documents.extend(docs)
+    return docs
+
+# Load the markdown files in parallel; loading is dominated by file I/O
+with ThreadPoolExecutor(max_workers=min(32, len(markdown_files) or 1)) as executor:
+    documents = list(chain.from_iterable(executor.map(load_markdown, markdown_files)))
 
 # Split documents into chunks
-text_splitter = MarkdownTextSplitter(chunk_size=1000, chunk_overlap=200)
+text_splitter = MarkdownTextSplitter(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
 splits = text_splitter.split_documents(documents)
 
 print(f"Split documents into {len(splits)} chunks")
 
-# Initialize embeddings - using FakeEmbeddings as a lightweight alternative
-embeddings = FakeEmbeddings(size=1536)
+# Initialize embeddings - a small local model, so retrieval returns relevant chunks
+embeddings = FastEmbedEmbeddings(model_name=Config.EMBEDDING_MODEL)
+
+# Drop any existing collection so the index is rebuilt with the current embedding model
+Chroma(persist_directory=str(db_dir), embedding_function=embeddings).delete_collection()
+
+# Create the vector database (Chroma persists on write)
+vectordb = Chroma(persist_directory=str(db_dir), embedding_function=embeddings)
 
-# Create and persist the vector database
-vectordb = Chroma.from_documents(
-    documents=splits,
-    embedding=embeddings,
-    persist_directory=str(db_dir)
-)
+# Add chunks in fixed-size batches to bound memory use and report progress
+batch_size = Config.INGEST_BATCH_SIZE
+for start in range(0, len(splits), batch_size):
+    vectordb.add_documents(splits[start:start + batch_size])
+    print(f"Indexed {min(start + batch_size, len(splits))}/{len(splits)} chunks")
 
-# Persist the database
-vectordb.persist()
+# Cached retrieval results refer to the old index
+QueryCache(Config.QUERY_CACHE_PATH).invalidate()
 
 print(f"Vector database created and persisted at {db_dir}")
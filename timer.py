@@ -30,15 +30,69 @@ Usage:
 """
 
 import time
+import heapq
+import itertools
 import threading
 import logging
 import functools
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, List, Tuple
 from contextlib import contextmanager
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class _TimerScheduler:
+    """
+    A single background thread that emits periodic updates for all running timers.
+
+    Timers are kept in a heap ordered by their next update time, so nested
+    timers share one thread instead of each sleeping in a thread of its own.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, 'RuntimeTimer']] = []
+        self._counter = itertools.count()  # Tie-breaker so timers themselves are never compared
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, timer: 'RuntimeTimer') -> None:
+        """Schedule periodic updates for a timer that has just started."""
+        with self._condition:
+            next_update = time.monotonic() + timer.update_interval
+            heapq.heappush(self._heap, (next_update, next(self._counter), timer))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, timer: 'RuntimeTimer') -> None:
+        """Stop periodic updates for a timer."""
+        with self._condition:
+            self._heap = [entry for entry in self._heap if entry[2] is not timer]
+            heapq.heapify(self._heap)
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """Sleep until the next update is due, then log it and reschedule."""
+        while True:
+            with self._condition:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                next_update, _, timer = self._heap[0]
+                delay = next_update - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+                heapq.heapreplace(self._heap, (next_update + timer.update_interval, next(self._counter), timer))
+
+            # Log outside the lock so starting or stopping timers never waits on I/O
+            timer._update_progress()
+
+_scheduler = _TimerScheduler()
+
 class RuntimeTimer:
     """
     A timer class to track execution time with periodic updates.
@@ -60,7 +114,6 @@ class RuntimeTimer:
         self.start_time = 0.0
         self.end_time = 0.0
         self.is_running = False
-        self.timer_thread = None
         self.total_time = 0.0
     
     def start(self) -> None:
@@ -69,16 +122,12 @@ class RuntimeTimer:
             logger.warning(f"Timer for '{self.task_name}' is already running.")
             return
         
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         self.is_running = True
         logger.info(f"Started timer for '{self.task_name}'")
         
-        # Start a thread for periodic updates
-        self.timer_thread = threading.Thread(
-            target=self._update_progress,
-            daemon=True
-        )
-        self.timer_thread.start()
+        # Register for periodic updates from the shared scheduler thread
+        _scheduler.schedule(self)
     
     def stop(self) -> float:
         """
@@ -91,24 +140,21 @@ class RuntimeTimer:
             logger.warning(f"Timer for '{self.task_name}' is not running.")
             return self.total_time
         
-        self.end_time = time.time()
+        self.end_time = time.perf_counter()
         self.is_running = False
         self.total_time = self.end_time - self.start_time
         
-        # Wait for the timer thread to finish if it's still running
-        if self.timer_thread and self.timer_thread.is_alive():
-            self.timer_thread.join(timeout=1.0)
+        # Unregister from the scheduler; there is no thread to wait for
+        _scheduler.cancel(self)
         
         logger.info(f"Completed '{self.task_name}' in {self.total_time:.2f} seconds")
         return self.total_time
     
     def _update_progress(self) -> None:
-        """Periodically log the elapsed time while the timer is running."""
-        while self.is_running:
-            time.sleep(self.update_interval)
-            if self.is_running:  # Check again after sleep
-                elapsed = time.time() - self.start_time
-                logger.info(f"'{self.task_name}' running for {elapsed:.2f} seconds...")
+        """Log the elapsed time; called by the scheduler every update_interval seconds."""
+        if self.is_running:  # The timer may have stopped since this update was scheduled
+            elapsed = time.perf_counter() - self.start_time
+            logger.info(f"'{self.task_name}' running for {elapsed:.2f} seconds...")
     
     def __enter__(self) -> 'RuntimeTimer':
         """Context manager entry point."""